@@ -24,8 +24,21 @@ const DEFAULT_THRESHOLD = 3;
 const DEDUPE_TTL_SECONDS = 24 * 60 * 60;
 const SYNC_SERVICE_NAME = 'whatsapp-naukri-zapier-twilio';
 const SEND_RETRY_DELAY_MS = 800;
-
-let cachedSyncServiceSid = null;
+// Upper bound on body text kept for scoring; excerpts and hashes use far less.
+const MAX_BODY_LENGTH = 8192;
+const RECENT_DEDUPE_LIMIT = 1024;
+// Socket-level failures (e.g. a pooled keep-alive connection that went stale
+// while the instance was frozen) carry no HTTP status but are safe to retry.
+const TRANSIENT_SOCKET_CODES = new Set(['ECONNRESET', 'EPIPE', 'ETIMEDOUT']);
+
+let syncServiceSidPromise = null;
+let syncServiceSidAccount = '';
+let cachedClient = null;
+let cachedClientSid = '';
+let cachedClientToken = '';
+// Dedupe keys this warm instance has already claimed in Sync, with expiry
+// times, so repeats (e.g. Zapier retries) skip the Sync round-trip.
+const recentDedupeKeys = new Map();
 
 function cleanString(value) {
   if (value === null || value === undefined) {
@@ -77,7 +90,7 @@ function parsePayload(event) {
     from: cleanString(payload?.from),
     date: cleanString(payload?.date),
     snippet: cleanString(payload?.snippet),
-    body: cleanString(payload?.body),
+    body: clip(payload?.body, MAX_BODY_LENGTH),
     source: cleanString(payload?.source) || DEFAULT_SOURCE
   };
 }
@@ -150,6 +163,9 @@ function createJsonResponse(statusCode, bodyObj) {
 }
 
 function isTransientError(error) {
+  if (TRANSIENT_SOCKET_CODES.has(error?.code)) {
+    return true;
+  }
   const statusCode = Number(error?.status || error?.statusCode);
   return statusCode === 429 || (statusCode >= 500 && statusCode < 600);
 }
@@ -158,6 +174,19 @@ function sleep(ms) {
   return new Promise((resolve) => setTimeout(resolve, ms));
 }
 
+// Reuse one client (and its HTTP agent) across warm invocations so Sync and
+// Messages calls ride existing connections instead of new TLS handshakes.
+function getTwilioClient(context, createClient = twilio) {
+  const accountSid = context.TWILIO_ACCOUNT_SID;
+  const authToken = context.TWILIO_AUTH_TOKEN;
+  if (!cachedClient || cachedClientSid !== accountSid || cachedClientToken !== authToken) {
+    cachedClient = createClient(accountSid, authToken, { keepAlive: true });
+    cachedClientSid = accountSid;
+    cachedClientToken = authToken;
+  }
+  return cachedClient;
+}
+
 async function sendWithRetry(client, params) {
   try {
     return await client.messages.create(params);
@@ -170,52 +199,86 @@ async function sendWithRetry(client, params) {
   }
 }
 
-async function resolveSyncServiceSid(client, context) {
-  const provided = cleanString(context.TWILIO_SYNC_SERVICE_SID);
-  if (provided) {
-    return provided;
-  }
-  if (cachedSyncServiceSid) {
-    return cachedSyncServiceSid;
-  }
-
+async function lookupSyncServiceSid(client) {
   const services = await client.sync.v1.services.list({ limit: 20 });
   const match = services.find((svc) => svc.friendlyName === SYNC_SERVICE_NAME);
   if (match) {
-    cachedSyncServiceSid = match.sid;
     return match.sid;
   }
   if (services.length > 0) {
-    cachedSyncServiceSid = services[0].sid;
     return services[0].sid;
   }
 
   const created = await client.sync.v1.services.create({
     friendlyName: SYNC_SERVICE_NAME
   });
-  cachedSyncServiceSid = created.sid;
   return created.sid;
 }
 
+async function resolveSyncServiceSid(client, context) {
+  const provided = cleanString(context.TWILIO_SYNC_SERVICE_SID);
+  if (provided) {
+    return provided;
+  }
+  // Cache the in-flight lookup per account so concurrent invocations share
+  // one list/create instead of racing to create duplicate services.
+  const accountSid = cleanString(context.TWILIO_ACCOUNT_SID);
+  if (!syncServiceSidPromise || syncServiceSidAccount !== accountSid) {
+    const lookup = lookupSyncServiceSid(client).catch((error) => {
+      if (syncServiceSidPromise === lookup) {
+        syncServiceSidPromise = null;
+      }
+      throw error;
+    });
+    syncServiceSidPromise = lookup;
+    syncServiceSidAccount = accountSid;
+  }
+  return syncServiceSidPromise;
+}
+
+function isRecentlyProcessed(dedupeKey, now = Date.now()) {
+  const expiresAt = recentDedupeKeys.get(dedupeKey);
+  if (expiresAt === undefined) {
+    return false;
+  }
+  recentDedupeKeys.delete(dedupeKey);
+  if (expiresAt <= now) {
+    return false;
+  }
+  // Re-insert on a hit so eviction drops the least recently used key.
+  recentDedupeKeys.set(dedupeKey, expiresAt);
+  return true;
+}
+
+function rememberDedupeKey(dedupeKey, now = Date.now()) {
+  recentDedupeKeys.delete(dedupeKey);
+  recentDedupeKeys.set(dedupeKey, now + DEDUPE_TTL_SECONDS * 1000);
+  if (recentDedupeKeys.size > RECENT_DEDUPE_LIMIT) {
+    const oldestKey = recentDedupeKeys.keys().next().value;
+    recentDedupeKeys.delete(oldestKey);
+  }
+}
+
 async function markAsProcessedIfNew(client, context, dedupeKey) {
   const serviceSid = await resolveSyncServiceSid(client, context);
-  const documents = client.sync.v1.services(serviceSid).documents;
-
-  try {
-    await documents(dedupeKey).fetch();
+  const recentKey = `${serviceSid}:${dedupeKey}`;
+  if (isRecentlyProcessed(recentKey)) {
     return false;
-  } catch (error) {
-    if (Number(error?.status) !== 404) {
-      throw error;
-    }
   }
 
+  const documents = client.sync.v1.services(serviceSid).documents;
+  // Taken before the create so the local expiry never outlives the Sync TTL.
+  const claimedAt = Date.now();
+
+  // A single create is both the existence check and the claim: Sync rejects
+  // a duplicate uniqueName with 409, so no separate fetch round-trip is needed.
   try {
     await documents.create({
       uniqueName: dedupeKey,
       data: { createdAt: new Date().toISOString() },
       ttl: DEDUPE_TTL_SECONDS
     });
+    rememberDedupeKey(recentKey, claimedAt);
     return true;
   } catch (error) {
     if (Number(error?.status) === 409) {
@@ -259,7 +322,7 @@ exports.handler = async function handler(context, event, callback) {
       return callback(null, createJsonResponse(500, { ok: false, error: 'missing_env' }));
     }
 
-    const client = twilio(context.TWILIO_ACCOUNT_SID, context.TWILIO_AUTH_TOKEN);
+    const client = getTwilioClient(context);
     const dedupeKey = buildDedupeKey(payload);
     const isNew = await markAsProcessedIfNew(client, context, dedupeKey);
 
@@ -284,6 +347,8 @@ exports._internal = {
   KEYWORDS,
   DEFAULT_SOURCE,
   DEFAULT_THRESHOLD,
+  MAX_BODY_LENGTH,
+  RECENT_DEDUPE_LIMIT,
   cleanString,
   clip,
   parsePayload,
@@ -291,6 +356,12 @@ exports._internal = {
   scorePayload,
   hashText,
   buildDedupeKey,
+  isRecentlyProcessed,
+  rememberDedupeKey,
   buildWhatsAppBody,
-  isTransientError
+  isTransientError,
+  getTwilioClient,
+  sendWithRetry,
+  resolveSyncServiceSid,
+  markAsProcessedIfNew
 };
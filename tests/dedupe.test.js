@@ -27,3 +27,196 @@ test('buildDedupeKey hash is deterministic without email_id', () => {
   assert.equal(first.startsWith('hash:'), true);
   assert.equal(first, second);
 });
+
+test('rememberDedupeKey marks a key as processed until the TTL expires', () => {
+  const key = 'email:recent-cache-test';
+  const now = Date.parse('2026-01-01T00:00:00Z');
+
+  assert.equal(_internal.isRecentlyProcessed(key, now), false);
+  _internal.rememberDedupeKey(key, now);
+  assert.equal(_internal.isRecentlyProcessed(key, now + 60 * 1000), true);
+  assert.equal(_internal.isRecentlyProcessed(key, now + 25 * 60 * 60 * 1000), false);
+});
+
+test('resolveSyncServiceSid shares one lookup across concurrent calls', async () => {
+  let listCalls = 0;
+  const client = {
+    sync: {
+      v1: {
+        services: {
+          list: async () => {
+            listCalls += 1;
+            return [{ sid: 'IS123', friendlyName: 'whatsapp-naukri-zapier-twilio' }];
+          }
+        }
+      }
+    }
+  };
+
+  const sids = await Promise.all([
+    _internal.resolveSyncServiceSid(client, {}),
+    _internal.resolveSyncServiceSid(client, {})
+  ]);
+
+  assert.deepEqual(sids, ['IS123', 'IS123']);
+  assert.equal(listCalls, 1);
+});
+
+function createSyncStub(createImpl) {
+  const calls = { create: 0, fetch: 0 };
+  const documents = () => ({
+    fetch: async () => {
+      calls.fetch += 1;
+      return {};
+    }
+  });
+  documents.create = async (params) => {
+    calls.create += 1;
+    return createImpl(params);
+  };
+  const client = {
+    sync: {
+      v1: {
+        services: () => ({ documents })
+      }
+    }
+  };
+  return { client, calls };
+}
+
+const syncContext = { TWILIO_SYNC_SERVICE_SID: 'IS00000000000000000000000000000000' };
+
+test('markAsProcessedIfNew claims with a single create and treats 409 as duplicate', async () => {
+  const created = createSyncStub(async () => ({}));
+  assert.equal(await _internal.markAsProcessedIfNew(created.client, syncContext, 'email:create-new'), true);
+  assert.deepEqual(created.calls, { create: 1, fetch: 0 });
+
+  const conflict = createSyncStub(async () => {
+    throw Object.assign(new Error('exists'), { status: 409 });
+  });
+  assert.equal(await _internal.markAsProcessedIfNew(conflict.client, syncContext, 'email:create-409'), false);
+  assert.deepEqual(conflict.calls, { create: 1, fetch: 0 });
+});
+
+test('markAsProcessedIfNew re-throws non-409 Sync errors', async () => {
+  const failing = createSyncStub(async () => {
+    throw Object.assign(new Error('boom'), { status: 500 });
+  });
+  await assert.rejects(
+    _internal.markAsProcessedIfNew(failing.client, syncContext, 'email:create-500'),
+    /boom/
+  );
+});
+
+test('markAsProcessedIfNew skips Sync for a key this instance already claimed', async () => {
+  const stub = createSyncStub(async () => ({}));
+  const key = 'email:claimed-once';
+
+  assert.equal(await _internal.markAsProcessedIfNew(stub.client, syncContext, key), true);
+  assert.equal(await _internal.markAsProcessedIfNew(stub.client, syncContext, key), false);
+  assert.equal(stub.calls.create, 1);
+});
+
+test('rememberDedupeKey evicts the oldest key beyond RECENT_DEDUPE_LIMIT', () => {
+  const now = Date.now();
+  _internal.rememberDedupeKey('email:evict-first', now);
+  for (let i = 0; i < _internal.RECENT_DEDUPE_LIMIT; i += 1) {
+    _internal.rememberDedupeKey(`email:evict-fill-${i}`, now);
+  }
+
+  assert.equal(_internal.isRecentlyProcessed('email:evict-first', now), false);
+  assert.equal(
+    _internal.isRecentlyProcessed(`email:evict-fill-${_internal.RECENT_DEDUPE_LIMIT - 1}`, now),
+    true
+  );
+});
+
+test('resolveSyncServiceSid looks up again when the account changes', async () => {
+  const makeClient = (sid) => ({
+    sync: { v1: { services: { list: async () => [{ sid, friendlyName: 'whatsapp-naukri-zapier-twilio' }] } } }
+  });
+
+  const first = await _internal.resolveSyncServiceSid(makeClient('IS-A'), { TWILIO_ACCOUNT_SID: 'AC-account-a' });
+  const second = await _internal.resolveSyncServiceSid(makeClient('IS-B'), { TWILIO_ACCOUNT_SID: 'AC-account-b' });
+
+  assert.equal(first, 'IS-A');
+  assert.equal(second, 'IS-B');
+});
+
+test('getTwilioClient reuses the client until credentials change', () => {
+  const contextA = {
+    TWILIO_ACCOUNT_SID: `AC${'a'.repeat(32)}`,
+    TWILIO_AUTH_TOKEN: 'token-a'
+  };
+  const contextB = { ...contextA, TWILIO_AUTH_TOKEN: 'token-b' };
+
+  const first = _internal.getTwilioClient(contextA);
+  assert.equal(_internal.getTwilioClient({ ...contextA }), first);
+
+  const rotated = _internal.getTwilioClient(contextB);
+  assert.notEqual(rotated, first);
+  assert.equal(_internal.getTwilioClient(contextB), rotated);
+});
+
+test('sendWithRetry retries once after a socket reset with no HTTP status', async () => {
+  let attempts = 0;
+  const client = {
+    messages: {
+      create: async () => {
+        attempts += 1;
+        if (attempts === 1) {
+          throw Object.assign(new Error('socket hang up'), { code: 'ECONNRESET' });
+        }
+        return { sid: 'SM123' };
+      }
+    }
+  };
+
+  const message = await _internal.sendWithRetry(client, { body: 'hi' });
+  assert.equal(message.sid, 'SM123');
+  assert.equal(attempts, 2);
+});
+
+test('getTwilioClient builds the client with keep-alive enabled', () => {
+  const calls = [];
+  const createClient = (...args) => {
+    calls.push(args);
+    return {};
+  };
+  const context = {
+    TWILIO_ACCOUNT_SID: `AC${'c'.repeat(32)}`,
+    TWILIO_AUTH_TOKEN: 'token-c'
+  };
+
+  _internal.getTwilioClient(context, createClient);
+  _internal.getTwilioClient(context, createClient);
+
+  assert.equal(calls.length, 1);
+  assert.deepEqual(calls[0], [context.TWILIO_ACCOUNT_SID, 'token-c', { keepAlive: true }]);
+});
+
+test('markAsProcessedIfNew does not reuse claims across Sync services', async () => {
+  const stub = createSyncStub(async () => ({}));
+  const key = 'email:claimed-per-service';
+
+  assert.equal(await _internal.markAsProcessedIfNew(stub.client, syncContext, key), true);
+  const otherService = { TWILIO_SYNC_SERVICE_SID: 'IS11111111111111111111111111111111' };
+  assert.equal(await _internal.markAsProcessedIfNew(stub.client, otherService, key), true);
+  assert.equal(stub.calls.create, 2);
+});
+
+test('isRecentlyProcessed keeps recently hit keys from being evicted', () => {
+  const now = Date.now();
+  _internal.rememberDedupeKey('email:lru-hit', now);
+  _internal.rememberDedupeKey('email:lru-miss', now);
+  for (let i = 0; i < _internal.RECENT_DEDUPE_LIMIT - 2; i += 1) {
+    _internal.rememberDedupeKey(`email:lru-fill-${i}`, now);
+  }
+
+  assert.equal(_internal.isRecentlyProcessed('email:lru-hit', now), true);
+  _internal.rememberDedupeKey('email:lru-new-1', now);
+  _internal.rememberDedupeKey('email:lru-new-2', now);
+
+  assert.equal(_internal.isRecentlyProcessed('email:lru-hit', now), true);
+  assert.equal(_internal.isRecentlyProcessed('email:lru-miss', now), false);
+});
@@ -23,3 +23,9 @@ test('getDetectorThreshold falls back to default when invalid', () => {
   assert.equal(_internal.getDetectorThreshold('0'), 3);
   assert.equal(_internal.getDetectorThreshold('5'), 5);
 });
+
+test('parsePayload caps body length before scoring', () => {
+  const payload = _internal.parsePayload({ body: `interview ${'x'.repeat(20000)}` });
+  assert.equal(payload.body.length, _internal.MAX_BODY_LENGTH);
+  assert.equal(payload.body.startsWith('interview'), true);
+});